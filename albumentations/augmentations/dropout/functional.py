@@ -1,9 +1,22 @@
-from typing import List, Tuple, Union, Iterable
+from typing import List, Optional, Sequence, Tuple, Union, Iterable
 
+import cv2
 import numpy as np
+import skimage.measure
+
 from ..functional import preserve_shape
 
-__all__ = ["cutout", "channel_dropout"]
+__all__ = [
+    "cutout",
+    "channel_dropout",
+    "binarize",
+    "label_dtype",
+    "label",
+    "label_with_stats",
+    "labels_bbox",
+    "labels_to_mask",
+    "mask_dropout",
+]
 
 
 @preserve_shape
@@ -26,3 +39,143 @@ def cutout(
     for x1, y1, x2, y2 in holes:
         img[y1:y2, x1:x2] = fill_value
     return img
+
+
+def binarize(mask: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Return boolean array of non-zero pixels of the mask.
+
+    `out` is an optional preallocated boolean array of the same shape as the mask to store the result in.
+    """
+    if mask.dtype == np.uint8 and mask.ndim == 2:
+        # OpenCV's threshold is vectorized, 0/1 uint8 result can be viewed as bool without a copy
+        dst = None if out is None else out.view(np.uint8)
+        return cv2.threshold(mask, 0, 1, cv2.THRESH_BINARY, dst=dst)[1].view(bool)
+    return np.not_equal(mask, 0, out=out)
+
+
+def label_dtype(shape: Tuple[int, ...]) -> np.dtype:
+    """Smallest dtype that fits labels of a single valued mask of the given shape."""
+    height, width = shape[:2]
+    # 8-connected regions are at least one pixel apart, so there can't be more than ceil(H / 2) * ceil(W / 2) of them
+    if ((height + 1) // 2) * ((width + 1) // 2) <= np.iinfo(np.uint16).max:
+        return np.dtype(np.uint16)
+    return np.dtype(np.int32)
+
+
+def _has_single_value(mask: np.ndarray, binary: np.ndarray) -> bool:
+    """Check whether all non-zero pixels of the mask have the same value, without sorting the mask."""
+    if mask.dtype == bool:
+        return True
+    first = np.argmax(binary)  # stops at the first non-zero pixel
+    if not binary.flat[first]:
+        return True
+    return np.count_nonzero(mask == mask.flat[first]) == np.count_nonzero(binary)
+
+
+def _label(
+    mask: np.ndarray, out: Optional[np.ndarray], with_stats: bool
+) -> Tuple[np.ndarray, int, Optional[np.ndarray]]:
+    if mask.ndim == 3:
+        mask = mask[..., 0] if mask.shape[-1] == 1 else np.any(mask, axis=-1)
+
+    binary = binarize(mask)
+    if not _has_single_value(mask, binary):
+        # Regions of different values must not be merged. skimage labels all values in a single pass,
+        # while OpenCV would need a pass per value, which is much slower on instance masks.
+        label_image, num_labels = skimage.measure.label(mask, return_num=True)
+        return label_image, num_labels, None
+
+    ltype = cv2.CV_16U if label_dtype(mask.shape) == np.uint16 else cv2.CV_32S
+    if with_stats:
+        num_labels_plus_bg, label_image, stats, _ = cv2.connectedComponentsWithStats(
+            binary.view(np.uint8), labels=out, connectivity=8, ltype=ltype
+        )
+        return label_image, num_labels_plus_bg - 1, stats
+    num_labels_plus_bg, label_image = cv2.connectedComponents(
+        binary.view(np.uint8), labels=out, connectivity=8, ltype=ltype
+    )
+    return label_image, num_labels_plus_bg - 1, None
+
+
+def label(mask: np.ndarray, out: Optional[np.ndarray] = None) -> Tuple[np.ndarray, int]:
+    """Label connected regions of equal non-zero value using 8-connectivity.
+
+    Equivalent to ``skimage.measure.label(mask, return_num=True)`` for 2D masks. Masks with a single
+    non-zero value are labeled with ``cv2.connectedComponents``, which is considerably faster, into uint16
+    label image when it is guaranteed to fit, to reduce memory traffic of the passes that read it.
+    Masks with several non-zero values (e.g. instance masks) fall back to skimage.
+
+    Args:
+        mask: Single-channel mask, zero values treated as background.
+        out: Optional preallocated array of shape (H, W) and dtype ``label_dtype(mask.shape)``
+            to store the label image in. Not used for masks with several non-zero values.
+
+    Returns:
+        Tuple of label image of shape (H, W) and number of labels.
+
+    """
+    label_image, num_labels, _ = _label(mask, out, False)
+    return label_image, num_labels
+
+
+def label_with_stats(
+    mask: np.ndarray, out: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, int, Optional[np.ndarray]]:
+    """Label the mask like `label` and also return per-label statistics for single-valued masks.
+
+    Returns:
+        Tuple of label image, number of labels and int32 array of shape (num_labels + 1, 5) where row `i`
+        is ``cv2.connectedComponentsWithStats`` statistics (x, y, width, height, area) of label `i`.
+        Statistics are None for masks with several non-zero values.
+
+    """
+    label_image, num_labels, stats = _label(mask, out, True)
+    return label_image, num_labels, stats
+
+
+def labels_bbox(stats: np.ndarray, labels_index: Optional[np.ndarray] = None) -> Tuple[int, int, int, int]:
+    """Union bounding box (x_min, y_min, x_max, y_max) of the selected labels, all labels by default."""
+    stats = stats[1:] if labels_index is None else stats[labels_index]
+    x_min, y_min = stats[:, cv2.CC_STAT_LEFT].min(), stats[:, cv2.CC_STAT_TOP].min()
+    x_max = (stats[:, cv2.CC_STAT_LEFT] + stats[:, cv2.CC_STAT_WIDTH]).max()
+    y_max = (stats[:, cv2.CC_STAT_TOP] + stats[:, cv2.CC_STAT_HEIGHT]).max()
+    return int(x_min), int(y_min), int(x_max), int(y_max)
+
+
+def labels_to_mask(
+    label_image: np.ndarray, labels_index: np.ndarray, num_labels: int, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Build boolean mask of pixels which label is one of `labels_index`.
+
+    `out` is an optional preallocated boolean array to store the result in.
+    """
+    # Single gather through a tiny lookup table instead of comparing the label image against every label
+    lut = np.zeros(num_labels + 1, dtype=bool)
+    lut[labels_index] = True
+    return np.take(lut, label_image, out=out, mode="clip")
+
+
+# Element types supported by cv2.copyTo
+_CV2_COPY_DTYPES = {
+    np.dtype(dtype) for dtype in (np.uint8, np.int8, np.uint16, np.int16, np.int32, np.float32, np.float64)
+}
+
+
+def mask_dropout(
+    img: np.ndarray, dropout_mask: np.ndarray, fill_value: Union[int, float, Sequence[Union[int, float]], np.ndarray]
+) -> np.ndarray:
+    """Fill pixels of the image where `dropout_mask` is True with `fill_value`.
+
+    Works the same way for a stack of images of shape (B, H, W) or (B, H, W, C) with a stack of
+    dropout masks of shape (B, H, W), e.g. in a ``collate_fn``, so the whole batch is filled in one call.
+    """
+    if img.dtype in _CV2_COPY_DTYPES and dropout_mask.ndim == 2 and img.shape[:2] == dropout_mask.shape:
+        # OpenCV's masked copy is SIMD vectorized and much faster than numpy's masked writes
+        out = np.full(img.shape, fill_value, dtype=img.dtype)
+        cv2.copyTo(img, np.logical_not(dropout_mask).view(np.uint8), dst=out)
+        return out
+
+    # For the rest numpy's copy followed by boolean scatter is still faster than np.where
+    img = img.copy()
+    img[dropout_mask] = fill_value
+    return img
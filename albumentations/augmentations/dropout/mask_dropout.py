@@ -1,16 +1,26 @@
 import random
-from typing import Union, Tuple, Any, Dict
+import threading
+from typing import Union, Tuple, Any, Dict, Optional, cast
 
 import cv2
 import numpy as np
-from skimage.measure import label
 
+from ... import random_utils
 from ...core.transforms_interface import DualTransform
 from ...core.transforms_interface import to_tuple
+from .functional import binarize, label, label_dtype, label_with_stats, labels_bbox, labels_to_mask, mask_dropout
 
 __all__ = ["MaskDropout", "MaskDropoutV2"]
 
 
+def _sample_labels(num_labels: int, k: int) -> np.ndarray:
+    """Sample k distinct labels from [1, num_labels]."""
+    if k > 256 + num_labels // 32:
+        # Vectorized sampling permutes all labels, it pays off its setup cost only when many of them are drawn
+        return random_utils.choice(num_labels, size=k, replace=False) + 1
+    return np.fromiter(random.sample(range(1, num_labels + 1), k), dtype=np.intp)
+
+
 class MaskDropout(DualTransform):
     """
     Image & mask augmentation that zero out mask and image regions corresponding
@@ -46,6 +56,34 @@ class MaskDropout(DualTransform):
         self.max_objects = to_tuple(max_objects, 1)
         self.image_fill_value = image_fill_value
         self.mask_fill_value = mask_fill_value
+        # Per-thread label image buffer, freed together with its thread
+        self._scratch = threading.local()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Scratch buffers can't be pickled and aren't worth it (e.g. when transform is sent to DataLoader workers)
+        state = self.__dict__.copy()
+        del state["_scratch"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]):
+        self.__dict__.update(state)
+        self._scratch = threading.local()
+
+    def _label_buffer(self, mask: np.ndarray) -> np.ndarray:
+        """Return label image buffer of this thread, reused between calls while mask shape stays the same."""
+        shape, dtype = mask.shape[:2], label_dtype(mask.shape)
+        buf = getattr(self._scratch, "label_image", None)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = self._scratch.label_image = np.empty(shape, dtype=dtype)
+        return buf
+
+    def _label(self, mask: np.ndarray) -> Tuple[np.ndarray, int, Optional[np.ndarray]]:
+        out = self._label_buffer(mask)
+        if self.image_fill_value == "inpaint":
+            # Inpainting needs bounding box of dropped regions, which labeling computes almost for free
+            return label_with_stats(mask, out=out)
+        label_image, num_labels = label(mask, out=out)
+        return label_image, num_labels, None
 
     @property
     def targets_as_params(self):
@@ -54,37 +92,51 @@ class MaskDropout(DualTransform):
     def get_params_dependent_on_targets(self, params) -> Dict[str, Any]:
         mask = params["mask"]
 
-        label_image, num_labels = label(mask, return_num=True)
+        objects_to_drop = random.randint(self.max_objects[0], self.max_objects[1])
+        if objects_to_drop <= 0:
+            # Nothing to drop, so there is no need to label the mask
+            params.update({"dropout_mask": None, "dropout_bbox": None})
+            return params
+
+        label_image, num_labels, stats = self._label(mask)
 
+        dropout_bbox = None
         if num_labels == 0:
             dropout_mask = None
+        elif objects_to_drop >= num_labels:
+            dropout_mask = binarize(mask)
+            if stats is not None:
+                dropout_bbox = labels_bbox(stats)
         else:
-            objects_to_drop = random.randint(self.max_objects[0], self.max_objects[1])
-            objects_to_drop = min(num_labels, objects_to_drop)
+            labels_index = _sample_labels(num_labels, objects_to_drop)
+            dropout_mask = labels_to_mask(label_image, labels_index, num_labels)
+            if stats is not None:
+                dropout_bbox = labels_bbox(stats, labels_index)
 
-            if objects_to_drop == num_labels:
-                dropout_mask = mask > 0
-            else:
-                labels_index = random.sample(range(1, num_labels + 1), objects_to_drop)
-                dropout_mask = np.zeros((mask.shape[0], mask.shape[1]), dtype=bool)
-                for label_index in labels_index:
-                    dropout_mask |= label_image == label_index
-
-        params.update({"dropout_mask": dropout_mask})
+        params.update({"dropout_mask": dropout_mask, "dropout_bbox": dropout_bbox})
         return params
 
-    def apply(self, img: np.ndarray, dropout_mask: np.ndarray = None, **params) -> np.ndarray:
+    def apply(
+        self,
+        img: np.ndarray,
+        dropout_mask: Optional[np.ndarray] = None,
+        dropout_bbox: Optional[Tuple[int, int, int, int]] = None,
+        **params
+    ) -> np.ndarray:
         if dropout_mask is None:
             return img
 
         if self.image_fill_value == "inpaint":
-            dropout_mask = dropout_mask.astype(np.uint8)
-            _, _, w, h = cv2.boundingRect(dropout_mask)
+            # Reinterpret boolean mask as 0/1 uint8 mask without a copy
+            dropout_mask = dropout_mask.view(np.uint8)
+            if dropout_bbox is None:
+                _, _, w, h = cv2.boundingRect(dropout_mask)
+            else:
+                w, h = dropout_bbox[2] - dropout_bbox[0], dropout_bbox[3] - dropout_bbox[1]
             radius = min(3, max(w, h) // 2)
             img = cv2.inpaint(img, dropout_mask, radius, cv2.INPAINT_NS)
         else:
-            img = img.copy()
-            img[dropout_mask] = self.image_fill_value
+            img = mask_dropout(img, dropout_mask, cast(Union[int, float], self.image_fill_value))
 
         return img
 
@@ -92,9 +144,7 @@ class MaskDropout(DualTransform):
         if dropout_mask is None:
             return img
 
-        img = img.copy()
-        img[dropout_mask] = self.mask_fill_value
-        return img
+        return mask_dropout(img, dropout_mask, self.mask_fill_value)
 
     def get_transform_init_args_names(self) -> Tuple[str, ...]:
         return "max_objects", "image_fill_value", "mask_fill_value"
@@ -144,8 +194,18 @@ class MaskDropoutV2(MaskDropout):
     def get_params_dependent_on_targets(self, params):
         mask = params["mask"]
 
-        label_image, num_labels = label(mask, return_num=True)
+        # Fractions that always drop nothing or everything don't need connected components
+        if self.max_objects[1] <= 0:
+            params.update({"dropout_mask": None, "dropout_bbox": None})
+            return params
+        if self.max_objects[0] >= 1:
+            dropout_mask = binarize(mask)
+            params.update({"dropout_mask": dropout_mask if dropout_mask.any() else None, "dropout_bbox": None})
+            return params
+
+        label_image, num_labels, stats = self._label(mask)
 
+        dropout_bbox = None
         if num_labels == 0:
             dropout_mask = None
         else:
@@ -153,26 +213,36 @@ class MaskDropoutV2(MaskDropout):
                 int(num_labels * self.max_objects[0]), int(num_labels * self.max_objects[1])
             )
 
-            labels_index = random.sample(range(1, num_labels + 1), k=objects_to_drop)
-            dropout_mask = np.zeros((mask.shape[0], mask.shape[1]), dtype=bool)
-            for label_index in labels_index:
-                dropout_mask |= label_image == label_index
+            if objects_to_drop <= 0:
+                dropout_mask = None
+            elif objects_to_drop >= num_labels:
+                dropout_mask = binarize(mask)
+                if stats is not None:
+                    dropout_bbox = labels_bbox(stats)
+            else:
+                labels_index = _sample_labels(num_labels, objects_to_drop)
+                dropout_mask = labels_to_mask(label_image, labels_index, num_labels)
+                if stats is not None:
+                    dropout_bbox = labels_bbox(stats, labels_index)
 
-        params.update({"dropout_mask": dropout_mask})
+        params.update({"dropout_mask": dropout_mask, "dropout_bbox": dropout_bbox})
         return params
 
-    def apply(self, img, dropout_mask=None, **params):
+    def apply(self, img, dropout_mask=None, dropout_bbox=None, **params):
         if dropout_mask is None:
             return img
 
         if self.image_fill_value == "inpaint":
-            dropout_mask = dropout_mask.astype(np.uint8)
-            _, _, w, h = cv2.boundingRect(dropout_mask)
+            # Reinterpret boolean mask as 0/1 uint8 mask without a copy
+            dropout_mask = dropout_mask.view(np.uint8)
+            if dropout_bbox is None:
+                _, _, w, h = cv2.boundingRect(dropout_mask)
+            else:
+                w, h = dropout_bbox[2] - dropout_bbox[0], dropout_bbox[3] - dropout_bbox[1]
             radius = min(3, max(w, h) // 2)
             img = cv2.inpaint(img, dropout_mask, radius, cv2.INPAINT_NS)
         else:
-            img = img.copy()
-            img[dropout_mask] = self.image_fill_value
+            img = mask_dropout(img, dropout_mask, self.image_fill_value)
 
         return img
 
@@ -180,9 +250,7 @@ class MaskDropoutV2(MaskDropout):
         if dropout_mask is None:
             return img
 
-        img = img.copy()
-        img[dropout_mask] = self.mask_fill_value
-        return img
+        return mask_dropout(img, dropout_mask, self.mask_fill_value)
 
     def get_transform_init_args_names(self):
         return "max_objects", "image_fill_value", "mask_fill_value"
@@ -51,6 +51,7 @@ __all__ = [
     "from_distance_maps",
     "keypoint_piecewise_affine",
     "bbox_piecewise_affine",
+    "roll",
 ]
 
 
@@ -896,3 +897,20 @@ def bbox_piecewise_affine(
     x2 = keypoints_arr[:, 0].max()
     y2 = keypoints_arr[:, 1].max()
     return normalize_bbox((x1, y1, x2, y2), h, w)
+
+
+def roll(img: np.ndarray, roll_x: int, roll_y: int) -> np.ndarray:
+    """Roll image along both spatial axes, same as two consecutive `np.roll` calls.
+
+    Unlike `np.roll`, the result is assembled with a single copy of the input.
+
+    """
+    height, width = img.shape[:2]
+    shift_y, shift_x = roll_y % height, roll_x % width
+
+    out = np.empty_like(img)
+    out[:shift_y, :shift_x] = img[height - shift_y :, width - shift_x :]
+    out[:shift_y, shift_x:] = img[height - shift_y :, : width - shift_x]
+    out[shift_y:, :shift_x] = img[: height - shift_y, width - shift_x :]
+    out[shift_y:, shift_x:] = img[: height - shift_y, : width - shift_x]
+    return out
@@ -5,6 +5,7 @@ import numpy as np
 
 
 from ...core.transforms_interface import DualTransform
+from . import functional as F
 
 __all__ = ["Roll"]
 
@@ -20,14 +21,10 @@ class Roll(DualTransform):
         return {"roll_x": roll_x, "roll_y": roll_y}
 
     def apply(self, img: np.ndarray, roll_x: int = 0, roll_y: int = 0, **params) -> np.ndarray:
-        img = np.roll(img, shift=roll_y, axis=0)
-        img = np.roll(img, shift=roll_x, axis=1)
-        return img
+        return F.roll(img, roll_x, roll_y)
 
     def apply_to_mask(self, img: np.ndarray, roll_x: int = 0, roll_y: int = 0, **params) -> np.ndarray:
-        img = np.roll(img, shift=roll_y, axis=0)
-        img = np.roll(img, shift=roll_x, axis=1)
-        return img
+        return F.roll(img, roll_x, roll_y)
 
     @property
     def targets_as_params(self) -> List[str]:
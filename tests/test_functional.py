@@ -8,6 +8,7 @@ from numpy.testing import assert_array_almost_equal_nulp
 import albumentations as A
 import albumentations.augmentations.functional as F
 import albumentations.augmentations.geometric.functional as FGeometric
+import albumentations.augmentations.dropout.functional as FDropout
 from albumentations.augmentations.bbox_utils import filter_bboxes
 from tests.utils import convert_2d_to_target_format
 
@@ -958,3 +959,142 @@ def test_cv_dtype_from_np():
     assert F.get_opencv_dtype_from_numpy(np.dtype("float32")) == cv2.CV_32F
     assert F.get_opencv_dtype_from_numpy(np.dtype("float64")) == cv2.CV_64F
     assert F.get_opencv_dtype_from_numpy(np.dtype("int32")) == cv2.CV_32S
+
+
+@pytest.mark.parametrize(
+    ["dtype", "shape", "values"],
+    [
+        # Single-valued masks, labeled by OpenCV
+        (np.uint8, [100, 100], [0, 1]),
+        (bool, [100, 100], [0, 1]),
+        (np.float32, [100, 100], [0, 2]),
+        (np.int64, [100, 100], [0, 7]),
+        (np.uint8, [600, 600], [0, 1]),
+        # Masks with several values, labeled by skimage
+        (np.uint8, [100, 100], [0, 1, 2, 3]),
+        (np.int64, [100, 100], [0, 1, 2, 3]),
+    ],
+)
+def test_dropout_label_matches_skimage(dtype, shape, values):
+    from skimage.measure import label
+
+    mask = np.random.choice(values, shape).astype(dtype)
+    expected, expected_num = label(mask, return_num=True)
+    result, num = FDropout.label(mask)
+
+    assert num == expected_num
+    if len(values) == 2:
+        # uint16 for small masks, int32 for larger ones
+        assert result.dtype == FDropout.label_dtype(mask.shape)
+    # Labels may be numbered differently, but both must describe the same regions
+    pairs = np.unique(np.stack([expected.ravel(), result.ravel()]), axis=1)
+    assert pairs.shape[1] == num + 1
+
+
+@pytest.mark.parametrize("dtype", [np.int32, np.float32])
+def test_dropout_label_instance_mask(dtype):
+    from skimage.measure import label
+
+    # Many touching and overlapping instances, each with its own id
+    mask = np.zeros([256, 256], dtype=dtype)
+    for instance_id in range(1, 301):
+        y, x = np.random.randint(0, 236, 2)
+        mask[y : y + np.random.randint(5, 20), x : x + np.random.randint(5, 20)] = instance_id
+
+    expected, expected_num = label(mask, return_num=True)
+    result, num = FDropout.label(mask)
+
+    assert num == expected_num
+    pairs = np.unique(np.stack([expected.ravel(), result.ravel()]), axis=1)
+    assert pairs.shape[1] == num + 1
+
+
+@pytest.mark.parametrize("num_labels", [0, 1, 3, 10])
+def test_dropout_labels_to_mask(num_labels):
+    label_image = np.random.randint(0, 20, [100, 100], dtype=np.int32)
+    labels_index = np.random.choice(np.arange(1, 20), num_labels, replace=False).astype(np.int32)
+
+    expected = np.zeros(label_image.shape, dtype=bool)
+    for label_index in labels_index:
+        expected |= label_image == label_index
+
+    result = FDropout.labels_to_mask(label_image, labels_index, 19)
+    assert result.dtype == bool
+    assert np.array_equal(result, expected)
+
+
+@pytest.mark.parametrize("shape", [(10, 12), (10, 12, 3)])
+@pytest.mark.parametrize(["roll_x", "roll_y"], [(0, 0), (3, 7), (12, 10), (-5, 14)])
+def test_roll(shape, roll_x, roll_y):
+    img = np.random.randint(0, 256, shape, dtype=np.uint8)
+    expected = np.roll(np.roll(img, shift=roll_y, axis=0), shift=roll_x, axis=1)
+    assert np.array_equal(FGeometric.roll(img, roll_x, roll_y), expected)
+
+
+@pytest.mark.parametrize(
+    "img",
+    [
+        np.random.randint(0, 256, [50, 60], dtype=np.uint8),
+        np.random.randint(0, 256, [50, 60, 1], dtype=np.uint8),
+        np.random.randint(0, 256, [50, 60, 3], dtype=np.uint8),
+        np.random.randint(0, 256, [50, 60, 6], dtype=np.uint8),
+        np.random.randint(0, 256, [60, 80, 3], dtype=np.uint8)[5:55, 10:70],
+        np.random.randint(0, 256, [3, 50, 60], dtype=np.uint8).transpose(1, 2, 0),
+        np.random.random([50, 60, 3]).astype(np.float32),
+        np.random.randint(0, 1000, [50, 60], dtype=np.uint16),
+        np.random.randint(0, 1000, [50, 60], dtype=np.int64),
+    ],
+)
+def test_mask_dropout(img):
+    dropout_mask = np.random.random([50, 60]) > 0.5
+    expected = img.copy()
+    expected[dropout_mask] = 7
+
+    result = FDropout.mask_dropout(img, dropout_mask, 7)
+    assert result.dtype == img.dtype
+    assert np.array_equal(result, expected)
+
+
+def test_mask_dropout_batch():
+    images = np.random.randint(0, 256, [4, 50, 60, 3], dtype=np.uint8)
+    dropout_masks = np.random.random([4, 50, 60]) > 0.5
+
+    result = FDropout.mask_dropout(images, dropout_masks, 7)
+    for image, dropout_mask, image_result in zip(images, dropout_masks, result):
+        assert np.array_equal(image_result, FDropout.mask_dropout(image, dropout_mask, 7))
+
+
+def test_dropout_labels_bbox():
+    mask = (np.random.random([100, 100]) > 0.9).astype(np.uint8)
+    label_image, num_labels, stats = FDropout.label_with_stats(mask)
+    assert stats.shape == (num_labels + 1, 5)
+
+    labels_index = np.random.choice(np.arange(1, num_labels + 1), 5, replace=False)
+    x, y, w, h = cv2.boundingRect(FDropout.labels_to_mask(label_image, labels_index, num_labels).view(np.uint8))
+    assert FDropout.labels_bbox(stats, labels_index) == (x, y, x + w, y + h)
+
+    x, y, w, h = cv2.boundingRect(mask)
+    assert FDropout.labels_bbox(stats) == (x, y, x + w, y + h)
+
+
+@pytest.mark.parametrize("with_stats", [False, True])
+def test_dropout_label_into_out(with_stats):
+    mask = (np.random.random([100, 100]) > 0.9).astype(np.uint8)
+    out = np.full([100, 100], 12345, dtype=np.uint16)
+
+    if with_stats:
+        label_image, num_labels, _ = FDropout.label_with_stats(mask, out=out)
+    else:
+        label_image, num_labels = FDropout.label(mask, out=out)
+
+    assert label_image.dtype == np.uint16
+    assert label_image is out
+    assert out.max() == num_labels
+    assert np.array_equal(out > 0, mask > 0)
+
+
+def test_dropout_label_with_stats_multiple_values():
+    mask = (np.random.randint(0, 4, [100, 100]) * (np.random.random([100, 100]) > 0.9)).astype(np.uint8)
+    _, num_labels, stats = FDropout.label_with_stats(mask)
+    assert num_labels > 0
+    assert stats is None
@@ -684,6 +684,47 @@ def test_multiplicative_noise_rgb(image):
     assert np.allclose(image, result)
 
 
+@pytest.mark.parametrize(["max_value", "has_bbox"], [(2, True), (4, False)])
+def test_mask_dropout_inpaint_bbox(max_value, has_bbox):
+    image = np.random.randint(0, 256, [100, 100, 3], np.uint8)
+    mask = (np.random.randint(1, max_value, [100, 100]) * (np.random.random([100, 100]) > 0.9)).astype(np.uint8)
+
+    aug = A.MaskDropout(max_objects=3, image_fill_value="inpaint", p=1)
+    params = aug.get_params_dependent_on_targets({"mask": mask})
+    assert (params["dropout_bbox"] is not None) == has_bbox
+
+    result = aug.apply_with_params(params, image=image, mask=mask)
+    assert result["image"].shape == image.shape
+
+
+def test_mask_dropout_params_are_not_shared():
+    mask = np.zeros([50, 50], dtype=np.uint8)
+    mask[5:10, 5:10] = 1
+    mask[20:30, 20:30] = 1
+    mask[40:45, 40:45] = 1
+
+    aug = A.MaskDropout(max_objects=1, p=1)
+    first = aug.get_params_dependent_on_targets({"mask": mask})["dropout_mask"]
+    expected = first.copy()
+    for _ in range(10):
+        aug.get_params_dependent_on_targets({"mask": mask})
+    assert np.array_equal(first, expected)
+
+
+def test_roll():
+    image = np.random.randint(0, 256, [50, 60, 3], np.uint8)
+    mask = np.random.randint(0, 4, [50, 60], np.uint8)
+
+    aug = A.Roll(p=1)
+    assert aug.targets_as_params == ["image"]
+
+    params = aug.get_params_dependent_on_targets({"image": image})
+    result = aug.apply_with_params(params, image=image, mask=mask)
+    shift = (params["roll_y"], params["roll_x"])
+    assert np.array_equal(result["image"], np.roll(image, shift=shift, axis=(0, 1)))
+    assert np.array_equal(result["mask"], np.roll(mask, shift=shift, axis=(0, 1)))
+
+
 def test_mask_dropout():
     # In this case we have mask with all ones, so MaskDropout wipe entire mask and image
     img = np.random.randint(0, 256, [50, 10], np.uint8)
@@ -704,6 +745,20 @@ def test_mask_dropout():
     assert np.all(result["mask"] == 0)
 
 
+@pytest.mark.parametrize(["max_objects", "expected_dropped"], [((0.0, 0.0), False), ((1.0, 1.0), True)])
+def test_mask_dropout_v2_extremes(max_objects, expected_dropped):
+    mask = np.zeros([50, 50], dtype=np.uint8)
+    mask[5:10, 5:10] = 1
+    mask[20:30, 20:30] = 1
+
+    aug = A.MaskDropoutV2(max_objects=max_objects)
+    dropout_mask = aug.get_params_dependent_on_targets({"mask": mask})["dropout_mask"]
+    if expected_dropped:
+        assert np.array_equal(dropout_mask, mask > 0)
+    else:
+        assert dropout_mask is None
+
+
 @pytest.mark.parametrize(
     "image",
     [